@@ -4,23 +4,47 @@
 #
 # - test1.py: Basic functionality smoke test.
 # - test2.py: Tests what happens when the command fails.
+# - test_syntax.py: Tests a command that the shell can't parse.
+# - test_jobs.py: Same as test1.py, with -j.
 
 from dataclasses import dataclass
-from contextlib import contextmanager
+from contextlib import ExitStack, contextmanager
+from concurrent.futures import ProcessPoolExecutor
 import os
+import re
 import subprocess
 import argparse
-from typing import Literal, Tuple
+import json
+import multiprocessing
+from typing import IO, Iterator, Literal, Optional, Tuple
 import tempfile
+import selectors
+import shlex
+import shutil
 import sys
 
 
-@dataclass
+# Resolved once instead of searching $PATH on every jj invocation
+JJ = shutil.which("jj") or "jj"
+
+
+@dataclass(frozen=True)
 class Change:
+    # `dataclass(slots=True)` needs Python 3.10
+    __slots__ = ("change_id", "commit_id", "description", "empty", "parents")
+
     commit_id: str
     change_id: str
     description: str
-    parents: list[str]
+    parents: Tuple[str, ...]
+    empty: bool
+
+
+# "Working copy  (@) now at: <change id> <commit id> ..." as printed by jj.
+# Only a full change ID counts; a short prefix can become ambiguous later on.
+WORKING_COPY_RE = re.compile(
+    r"^Working copy\s*\(@\) now at: ([k-z]{32})\b", re.MULTILINE
+)
 
 
 def run(
@@ -49,18 +73,212 @@ def run(
         )
         return result
     except subprocess.CalledProcessError as e:
-        print(f"{e.cmd=}, {e.stderr=}, {e.stdout=}", file=sys.stderr)
+        report_failure(e)
+        raise
+
+
+def report_failure(e: subprocess.CalledProcessError) -> None:
+    """
+    Print a failed command along with its output.
+    """
+    print(f"{e.cmd=}, {e.stderr=}, {e.stdout=}", file=sys.stderr)
+
+
+def run_capture(argv: list[str], cwd: str) -> subprocess.CompletedProcess:
+    """
+    Run a command and capture its output as text.
+
+    This and `run_quiet` cover almost all jj calls, so they call subprocess.run
+    directly instead of going through the generic `run` wrapper.
+
+    :param argv: Command to run
+    :param cwd: Working directory
+    """
+    try:
+        return subprocess.run(argv, cwd=cwd, text=True, capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        report_failure(e)
+        raise
+
+
+def run_quiet(argv: list[str], cwd: str) -> None:
+    """
+    Run a command whose output we don't need.
+
+    stdout goes straight to /dev/null instead of being captured and decoded;
+    stderr is still captured so that it can be reported if the command fails.
+
+    :param argv: Command to run
+    :param cwd: Working directory
+    """
+    try:
+        subprocess.run(
+            argv,
+            cwd=cwd,
+            text=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            check=True,
+        )
+    except subprocess.CalledProcessError as e:
+        report_failure(e)
         raise
 
 
+class PersistentShell:
+    """
+    A long-lived `sh` process that runs commands one after another.
+
+    Used to run the user command for each change without starting a new shell
+    every time. Each command is `eval`ed in its own subshell, so a syntax
+    error, `cd`, variables or `exit` stay inside that command. Its output goes
+    through a pair of FIFOs that are read until every writer is gone, so output
+    from background jobs is attributed to the command that started them, same
+    as with `subprocess.run(..., shell=True)`. The shell reads its script from
+    a separate pipe, so the user command gets our own stdin unless `stdin`
+    says otherwise (same values as for subprocess.Popen).
+    """
+
+    def __init__(self, stdin: Optional[int] = None) -> None:
+        self.stdin = stdin
+        self.fifo_dir = tempfile.mkdtemp(prefix="jj-run-shell-")
+        self.stdout_fifo = os.path.join(self.fifo_dir, "stdout")
+        self.stderr_fifo = os.path.join(self.fifo_dir, "stderr")
+        os.mkfifo(self.stdout_fifo)
+        os.mkfifo(self.stderr_fifo)
+        self.proc, self.script = self._start()
+
+    def _start(self) -> Tuple[subprocess.Popen, IO[bytes]]:
+        read_fd, write_fd = os.pipe()
+        try:
+            proc = subprocess.Popen(
+                ["sh", f"/dev/fd/{read_fd}"],
+                stdin=self.stdin,
+                stdout=subprocess.PIPE,
+                pass_fds=(read_fd,),
+            )
+        except BaseException:
+            os.close(write_fd)
+            raise
+        finally:
+            os.close(read_fd)
+        assert proc.stdout
+        os.set_blocking(proc.stdout.fileno(), False)
+        return proc, os.fdopen(write_fd, "wb")
+
+    def __enter__(self) -> "PersistentShell":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shut down the shell and wait for it to exit.
+        """
+        self._reap()
+        shutil.rmtree(self.fifo_dir, ignore_errors=True)
+
+    def _reap(self) -> None:
+        # Closing the script makes the shell exit once it's done
+        for pipe in (self.script, self.proc.stdout):
+            if pipe and not pipe.closed:
+                try:
+                    pipe.close()
+                except BrokenPipeError:
+                    pass
+        self.proc.wait()
+
+    def _send(self, script: bytes) -> None:
+        if self.proc.poll() is None:
+            try:
+                self.script.write(script)
+                self.script.flush()
+                return
+            except BrokenPipeError:
+                pass
+        # The shell is gone; start a new one
+        self._reap()
+        self.proc, self.script = self._start()
+        self.script.write(script)
+        self.script.flush()
+
+    def run(self, command: str, cwd: str) -> subprocess.CompletedProcess:
+        """
+        Run a command in the given directory and wait for it to finish.
+
+        :param command: Shell command to execute
+        :param cwd: Working directory for the command
+        :returns: CompletedProcess with the captured stdout, stderr and return code
+        """
+        # Everything that can fail happens in the subshell, so the shell itself
+        # keeps running.
+        script = (
+            f"(exec >{shlex.quote(self.stdout_fifo)} 2>{shlex.quote(self.stderr_fifo)};"
+            f" cd {shlex.quote(cwd)} && eval {shlex.quote(command)})\n"
+            "echo $?\n"
+        )
+        # We hold a write end of each FIFO ourselves until the shell reports
+        # the exit status. That way opening them never blocks, and if the
+        # shell dies, the FIFOs still reach EOF.
+        readers = [
+            os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+            for fifo in (self.stdout_fifo, self.stderr_fifo)
+        ]
+        holders = [
+            os.open(fifo, os.O_WRONLY | os.O_NONBLOCK)
+            for fifo in (self.stdout_fifo, self.stderr_fifo)
+        ]
+        buffers = {fd: bytearray() for fd in readers}
+        status = bytearray()
+        try:
+            # This may replace a dead shell, so only take its stdout afterwards
+            self._send(script.encode())
+            assert self.proc.stdout
+            status_fd = self.proc.stdout.fileno()
+            with selectors.DefaultSelector() as sel:
+                for fd in readers:
+                    sel.register(fd, selectors.EVENT_READ)
+                sel.register(status_fd, selectors.EVENT_READ)
+                while sel.get_map():
+                    for key, _ in sel.select():
+                        chunk = os.read(key.fd, 65536)
+                        if key.fd == status_fd:
+                            status += chunk
+                            if not chunk or status.endswith(b"\n"):
+                                sel.unregister(status_fd)
+                                for fd in holders:
+                                    os.close(fd)
+                                holders = []
+                        elif chunk:
+                            buffers[key.fd] += chunk
+                        else:
+                            sel.unregister(key.fd)
+        finally:
+            for fd in readers + holders:
+                os.close(fd)
+
+        returncode = int(status) if status.strip() else self.proc.wait()
+        stdout_fd, stderr_fd = readers
+        return subprocess.CompletedProcess(
+            command,
+            returncode,
+            buffers[stdout_fd].decode(errors="replace"),
+            buffers[stderr_fd].decode(errors="replace"),
+        )
+
+
 def print_command_result(result: subprocess.CompletedProcess) -> None:
     """
     Print the stdout and stderr of a subprocess result if present.
     """
-    if result.stdout and result.stdout.strip():
-        print(f"stdout: {result.stdout.strip()}")
-    if result.stderr and result.stderr.strip():
-        print(f"stderr: {result.stderr.strip()}", file=sys.stderr)
+    # Strip each stream once; command output can be large.
+    stdout = result.stdout.strip() if result.stdout else ""
+    stderr = result.stderr.strip() if result.stderr else ""
+    if stdout:
+        print(f"stdout: {stdout}")
+    if stderr:
+        print(f"stderr: {stderr}", file=sys.stderr)
     if result.returncode != 0:
         print(f"Command failed with return code {result.returncode}", file=sys.stderr)
     print()
@@ -82,11 +300,11 @@ def format_error_msg(result: subprocess.CompletedProcess, change: str) -> str:
 def managed_workspace():
     """
     Context manager to create and clean up a temporary workspace.
-    Yields (workspace_path, workspace_name).
+    Yields (workspace_path, workspace_name, workspace_change_id).
     """
-    workspace_path, workspace_name = create_workspace()
+    workspace_path, workspace_name, workspace_change_id = create_workspace()
     try:
-        yield workspace_path, workspace_name
+        yield workspace_path, workspace_name, workspace_change_id
     finally:
         forget_workspace(workspace_name)
 
@@ -95,56 +313,66 @@ def run_jj_command(
     command: str,
     revset: str,
     err_strategy: Literal["continue", "stop", "fatal"] = "continue",
+    jobs: int = 1,
 ) -> int:
     """
     Main entry point to run `jj run` with command handling and error strategies.
 
     :param command: User-provided command (e.g., "jj new && jj restore ...")
     :param err_strategy: Error handling strategy ("continue", "stop", "fatal")
+    :param jobs: How many changes to process in parallel, each in its own workspace
     """
-    with managed_workspace() as (workspace_path, workspace_name):
-        [workspace_change] = get_change_list(
-            f"{workspace_name}@", workspace_path=workspace_path
+    with ExitStack() as stack:
+        workspace_path, _workspace_name, workspace_change_id = stack.enter_context(
+            managed_workspace()
         )
         changes = get_change_list(
-            f"({revset}) ~ {workspace_change.change_id} ~ root()",
+            f"({revset}) ~ {workspace_change_id} ~ root()",
             workspace_path=workspace_path,
         )
         total_changes = len(changes)
         if not changes:
             print("No changes found to process.", file=sys.stderr)
-            abandon_changes([workspace_change.change_id])
+            abandon_changes([workspace_change_id])
             return 0  # Return 0 modified commits if no changes
-        new_changes: list[Change] = []
+        workspace_paths = [workspace_path]
+        workspace_change_ids = [workspace_change_id]
+        # No point in having more workspaces than changes
+        for _ in range(min(jobs, total_changes) - 1):
+            path, _name, change_id = stack.enter_context(managed_workspace())
+            workspace_paths.append(path)
+            workspace_change_ids.append(change_id)
+        marker = change_marker(workspace_path)
+        new_changes: Optional[list[Change]] = None
         modified_count = 0  # Initialize modified_count
         try:
-            new_changes, all_successful = process_changes(
-                workspace_path, changes, command, err_strategy
-            )
+            if len(workspace_paths) == 1:
+                all_successful = process_changes(
+                    workspace_path, changes, command, err_strategy, marker
+                )
+            else:
+                all_successful = process_changes_parallel(
+                    workspace_paths, changes, command, err_strategy, marker
+                )
+            new_changes = collect_new_changes(workspace_path, changes, marker)
             modified_count = rewrite_parents(workspace_path, new_changes)
-            run(["jj", "workspace", "update-stale"], cwd=".")
-            run(["jj", "workspace", "update-stale"], cwd=workspace_path)
+            # Only rewriting commits can make the working copy stale; if
+            # nothing was rewritten, `update-stale` would be a no-op. The temp
+            # workspaces are forgotten right after, so they are left stale.
+            if modified_count:
+                run_quiet([JJ, "workspace", "update-stale"], cwd=".")
         finally:
-            abandon_changes(
-                [c.change_id for c in new_changes] + [workspace_change.change_id]
-            )
+            # With "stop" and "fatal" we get here before the new changes were
+            # looked up; they still have to go.
+            if new_changes is None:
+                new_changes = collect_new_changes(workspace_path, changes, marker)
+            abandon_changes([c.change_id for c in new_changes] + workspace_change_ids)
         print(f"Rewrote {modified_count}/{total_changes} commits.", file=sys.stderr)
         if not all_successful:
             print("Not all changes were processed successfully.", file=sys.stderr)
         return modified_count
 
 
-def is_change_empty(workspace_path: str, change_id: str) -> bool:
-    """
-    Check if a change is empty (does not exist or has empty content).
-    """
-    result = run(
-        ["jj", "log", "-T", "json(empty)", "-r", f"present({change_id})", "--no-graph"],
-        cwd=workspace_path,
-    )
-    return result.stdout.strip() != "false"
-
-
 def rewrite_parents(workspace_path: str, changes: list[Change]) -> int:
     """
     For each change, rewrite its parent's snapshot to that commit.
@@ -153,14 +381,20 @@ def rewrite_parents(workspace_path: str, changes: list[Change]) -> int:
     """
     modified_count = 0
     for change in changes:
-        # If the change doesn't exist or is empty, we have to skip it b/c otherwise jj might fail when rewriting.
-        if not is_change_empty(workspace_path, change.change_id):
-            run(
-                ["jj", "edit", change.parents[0]],
-                cwd=workspace_path,
-            )
-            run(
-                ["jj", "restore", "--from", change.change_id, "--restore-descendants"],
+        # If the change is empty, we have to skip it b/c otherwise jj might fail when rewriting.
+        if not change.empty:
+            # Restore straight into the parent instead of `jj edit`-ing it
+            # first: one jj call per change, and @ never has to move.
+            run_quiet(
+                [
+                    JJ,
+                    "restore",
+                    "--from",
+                    change.change_id,
+                    "--into",
+                    change.parents[0],
+                    "--restore-descendants",
+                ],
                 cwd=workspace_path,
             )
             modified_count += 1
@@ -168,20 +402,37 @@ def rewrite_parents(workspace_path: str, changes: list[Change]) -> int:
     return modified_count
 
 
+def _revset_chunk_size(per_entry: int) -> int:
+    """
+    How many IDs to put into the revset of a single jj call.
+
+    :param per_entry: Length of one ID in the revset, including separators
+    """
+    chunk = 500
+    try:
+        arg_max = os.sysconf("SC_ARG_MAX")
+    except (AttributeError, ValueError, OSError):
+        return chunk
+    # Leave plenty of room for the environment and the rest of the command line.
+    return max(1, min(chunk, arg_max // 4 // per_entry))
+
+
 def abandon_changes(changes: list[str]) -> None:
     """
     Abandon all changes in the provided list.
 
+    The changes are abandoned in batches, one `jj abandon` call per batch.
+
     :param changes: List of change IDs to abandon
     """
-
-    # TODO: can batch but must make sure to not run into arg length limits
-    for change in changes:
+    # Each entry is `present(<12 chars>)|`
+    chunk = _revset_chunk_size(len("present()|") + 12)
+    for start in range(0, len(changes), chunk):
         # Only print first 12 chars of change id when abandoning
-        run(
-            ["jj", "abandon", f"present({change[:12]})", "--ignore-working-copy"],
-            cwd=".",
+        revset = "|".join(
+            f"present({change[:12]})" for change in changes[start : start + chunk]
         )
+        run_quiet([JJ, "abandon", revset, "--ignore-working-copy"], cwd=".")
 
 
 def forget_workspace(workspace_name: str) -> None:
@@ -190,59 +441,86 @@ def forget_workspace(workspace_name: str) -> None:
 
     :param workspace_name: Name of the workspace to forget
     """
-    run(["jj", "workspace", "forget", workspace_name], cwd=".")
+    run_quiet([JJ, "workspace", "forget", workspace_name], cwd=".")
 
 
-def get_change_list(revset: str, workspace_path: str = ".") -> list[Change]:
+def iter_changes(revset: str, workspace_path: str = ".") -> Iterator[Change]:
     """
-    Parse and return the list of changes in JSON format.
+    Stream the changes in a revset as `jj log` outputs them.
+
+    The output is parsed line by line as it arrives instead of being buffered
+    in full first.
 
-    :returns: Retrieved change history list as a list of dictionaries
+    :returns: Iterator over the changes in `jj log` order
     """
-    change_process = run(
-        [
-            "jj",
-            "log",
-            "-r",
-            revset,
-            "--template=json(self)",
-            "--no-graph",
-            "--config=ui.log-word-wrap=false",
-        ],
-        cwd=workspace_path,
-    )
-    if not change_process.stdout:
-        return []
+    argv = [
+        JJ,
+        "log",
+        "-r",
+        revset,
+        # `json(self)` doesn't include emptiness, so we add it alongside.
+        # Every entry ends up on its own line.
+        (
+            "--template='{\"commit\":' ++ json(self)"
+            ' ++ \',"empty":\' ++ json(empty) ++ "}\\n"'
+        ),
+        "--no-graph",
+        "--config=ui.log-word-wrap=false",
+    ]
+    decoder = json.JSONDecoder()
+    parents_cache: dict[Tuple[str, ...], Tuple[str, ...]] = {}
+    # stderr goes to a file so that a chatty jj can't block on a full pipe
+    # while we are still reading stdout.
+    with tempfile.TemporaryFile() as stderr_file, subprocess.Popen(
+        argv, cwd=workspace_path, stdout=subprocess.PIPE, stderr=stderr_file, text=True
+    ) as proc:
+        assert proc.stdout
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = decoder.decode(line)
+            except json.JSONDecodeError:
+                # Skip the offending line
+                continue
+            change_entry = entry["commit"]
+            # Many changes share parents (and IDs show up again as parents),
+            # so intern the IDs and reuse identical parent tuples.
+            parents = tuple(sys.intern(p) for p in change_entry.get("parents", ()))
+            parents = parents_cache.setdefault(parents, parents)
+            yield Change(
+                sys.intern(change_entry["commit_id"]),
+                sys.intern(change_entry["change_id"]),
+                change_entry.get("description", ""),
+                parents,
+                entry.get("empty", False),
+            )
+        returncode = proc.wait()
+        if returncode != 0:
+            stderr_file.seek(0)
+            e = subprocess.CalledProcessError(
+                returncode, argv, stderr=stderr_file.read().decode(errors="replace")
+            )
+            report_failure(e)
+            raise e
 
-    import json
 
-    changes = []
-    combined_output = change_process.stdout.strip()
-    while combined_output:
-        try:
-            change_entry, index = json.JSONDecoder().raw_decode(combined_output)
-            changes.append(
-                Change(
-                    change_id=change_entry["change_id"],
-                    commit_id=change_entry["commit_id"],
-                    description=change_entry.get("description", ""),
-                    parents=change_entry.get("parents", []),
-                )
-            )
-            combined_output = combined_output[index:].lstrip()
-        except json.JSONDecodeError:
-            combined_output = combined_output.lstrip()
-            if not combined_output:
-                break
-            combined_output = combined_output[combined_output.find("\n") + 1 :]
-    return changes
+def get_change_list(revset: str, workspace_path: str = ".") -> list[Change]:
+    """
+    Parse and return the list of changes in JSON format.
 
+    :returns: Retrieved change history list
+    """
+    return list(iter_changes(revset, workspace_path=workspace_path))
 
-def create_workspace() -> Tuple[str, str]:
+
+def create_workspace() -> Tuple[str, str, str]:
     """
     Add and return a new isolated workspace for the task.
 
-    :returns: Path to the created workspace directory and the name of the workspace
+    :returns: Path to the created workspace directory, the name of the workspace,
+        and the change ID of the workspace's working copy
     """
     # Create a temporary directory that will hold the workspace
     temp_dir = tempfile.mkdtemp(prefix="jj-run-")
@@ -251,8 +529,29 @@ def create_workspace() -> Tuple[str, str]:
     workspace_path = os.path.join(temp_dir, workspace_name)
 
     # Add the workspace, using the temporary directory as the destination
-    run(["jj", "workspace", "add", workspace_path], cwd=".")
-    return workspace_path, workspace_name
+    # Show full change IDs in the summary so we can take the working copy's
+    # change ID from it instead of asking `jj log` separately.
+    result = run_capture(
+        [
+            JJ,
+            "--config=template-aliases.'format_short_change_id(id)'='id'",
+            "workspace",
+            "add",
+            workspace_path,
+        ],
+        cwd=".",
+    )
+    match = WORKING_COPY_RE.search(result.stderr) or WORKING_COPY_RE.search(
+        result.stdout
+    )
+    if match:
+        workspace_change_id = match.group(1)
+    else:
+        [workspace_change] = get_change_list(
+            f"{workspace_name}@", workspace_path=workspace_path
+        )
+        workspace_change_id = workspace_change.change_id
+    return workspace_path, workspace_name, workspace_change_id
 
 
 def process_changes(
@@ -260,44 +559,193 @@ def process_changes(
     changes: list[Change],
     command: str,
     err_strategy: Literal["continue", "stop", "fatal"],
-) -> tuple[list[Change], bool]:
+    marker: str,
+) -> bool:
     """
     Process each change sequentially in an isolated workspace.
 
+    The new changes are described with `marker`, so that they can be found
+    with `collect_new_changes` afterwards.
+
     :param workspace_path: Path to the workspace directory
     :param command: The command to execute on each change
     :param err_strategy: Strategy for handling errors
-    :returns: Tuple of (List of newly created changes, all_successful: bool)
+    :param marker: Marker returned by `change_marker`
+    :returns: Whether all commands succeeded
     """
-    new_changes = []
     exit_early = False
     all_successful = True
-    import subprocess as sp
 
     total_changes = len(changes)
-    for idx, change_data in enumerate(changes, 1):
-        change_id = change_data.change_id
-        message = change_data.description.strip()
-        print(
-            f"Processing change {idx}/{total_changes} {change_id[:12]}: {message or '(no description set)'}",
-            file=sys.stderr,
+    # This loop is strictly sequential on purpose: `jj new` for the next change
+    # replaces the files the current command runs against, and each command sees
+    # the workspace state left by the previous `jj new`.
+    with PersistentShell() as shell:
+        for idx, change_data in enumerate(changes, 1):
+            change_id = change_data.change_id
+            message = change_data.description.strip()
+            print(
+                f"Processing change {idx}/{total_changes} {change_id[:12]}: {message or '(no description set)'}",
+                file=sys.stderr,
+            )
+            run_quiet(
+                [JJ, "new", change_id, "-m", f"{marker} {idx}"], cwd=workspace_path
+            )
+            result = shell.run(command, workspace_path)
+            print_command_result(result)
+            if result.returncode != 0:
+                all_successful = False
+            exit_early = handle_errors(result, err_strategy, change_id[:12])
+            if exit_early:
+                if err_strategy == "stop":
+                    raise SystemExit(result.returncode)
+                break
+
+    return all_successful
+
+
+def change_marker(workspace_path: str) -> str:
+    """
+    Prefix for the descriptions of the changes created during a run.
+
+    Every new change gets a marker description, so that all of them can be
+    looked up with a single `jj log` after processing instead of one per change.
+
+    :param workspace_path: Path to the run's main workspace
+    """
+    return f"{os.path.basename(workspace_path)}-change"
+
+
+def collect_new_changes(
+    workspace_path: str, changes: list[Change], marker: str
+) -> list[Change]:
+    """
+    Look up the changes created during a run, in the order they were processed.
+
+    Only the children of the processed changes are searched, in batches, so
+    that the lookup doesn't have to match every description in the repo.
+
+    :param workspace_path: Path to the workspace directory
+    :param changes: Changes that were processed
+    :param marker: Marker returned by `change_marker`
+    """
+    new_changes: list[Change] = []
+    # Each entry is `<40-char commit ID>|`
+    chunk = _revset_chunk_size(41)
+    for start in range(0, len(changes), chunk):
+        parents = "|".join(c.commit_id for c in changes[start : start + chunk])
+        new_changes += iter_changes(
+            f'children({parents}) & description(substring:"{marker} ")',
+            workspace_path=workspace_path,
         )
-        run(["jj", "new", change_id], cwd=workspace_path)
+    # `jj log` lists changes in its own order; restore the processing order.
+    order = {c.commit_id: i for i, c in enumerate(changes)}
+    new_changes.sort(key=lambda c: order.get(c.parents[0], len(order)))
+    return new_changes
+
+
+# Workspaces that are currently not used by any pool worker
+_free_workspaces: "Optional[multiprocessing.Queue[str]]" = None
+
+
+def _init_pool_worker(free_workspaces: "multiprocessing.Queue[str]") -> None:
+    global _free_workspaces
+    _free_workspaces = free_workspaces
+
+
+def _run_in_free_workspace(
+    change_id: str, description: str, command: str
+) -> subprocess.CompletedProcess:
+    """
+    Pool worker: create a new change on top of `change_id` in a free workspace
+    and run the command there.
+    """
+    assert _free_workspaces is not None
+    workspace_path = _free_workspaces.get()
+    try:
+        run_quiet([JJ, "new", change_id, "-m", description], cwd=workspace_path)
+        # Same way of running the command as in `process_changes`. Commands
+        # running side by side can't share our stdin, so they get none.
+        with PersistentShell(stdin=subprocess.DEVNULL) as shell:
+            return shell.run(command, workspace_path)
+    finally:
+        _free_workspaces.put(workspace_path)
+
+
+def process_changes_parallel(
+    workspace_paths: list[str],
+    changes: list[Change],
+    command: str,
+    err_strategy: Literal["continue", "stop", "fatal"],
+    marker: str,
+) -> bool:
+    """
+    Process changes in parallel, one worker process per workspace.
+
+    Results are reported in the same order as `process_changes` would report
+    them. With the "stop" and "fatal" strategies, changes that haven't started
+    yet are skipped; "stop" lets the running ones finish.
+
+    :param workspace_paths: Paths to the workspaces; the first one is the main one
+    :param command: The command to execute on each change
+    :param err_strategy: Strategy for handling errors
+    :param marker: Marker returned by `change_marker`
+    :returns: Whether all commands succeeded
+    """
+    all_successful = True
+    total_changes = len(changes)
+
+    free_workspaces: "multiprocessing.Queue[str]" = multiprocessing.Queue()
+    for path in workspace_paths:
+        free_workspaces.put(path)
+
+    with ProcessPoolExecutor(
+        max_workers=len(workspace_paths),
+        initializer=_init_pool_worker,
+        initargs=(free_workspaces,),
+    ) as ex:
+        futures = [
+            ex.submit(
+                _run_in_free_workspace, change.change_id, f"{marker} {idx}", command
+            )
+            for idx, change in enumerate(changes, 1)
+        ]
         try:
-            result = run(command, shell=True, cwd=workspace_path)
-        except sp.CalledProcessError as e:
-            # Create a CompletedProcess-like object for error handling
-            result = sp.CompletedProcess(e.cmd, e.returncode, e.output, e.stderr)
-        print_command_result(result)
-        if result.returncode != 0:
-            all_successful = False
-        exit_early = handle_errors(result, err_strategy, change_id[:12])
-        new_changes += get_change_list("@", workspace_path=workspace_path)
-        if exit_early:
-            if err_strategy == "stop":
-                raise SystemExit(result.returncode)
-            break
-    return new_changes, all_successful
+            for idx, (change_data, future) in enumerate(zip(changes, futures), 1):
+                change_id = change_data.change_id
+                message = change_data.description.strip()
+                print(
+                    f"Processing change {idx}/{total_changes} {change_id[:12]}: {message or '(no description set)'}",
+                    file=sys.stderr,
+                )
+                result = future.result()
+                print_command_result(result)
+                if result.returncode != 0:
+                    all_successful = False
+                if handle_errors(result, err_strategy, change_id[:12]):
+                    raise SystemExit(result.returncode)
+        finally:
+            # Skip the changes that haven't started yet; leaving the `with`
+            # block waits for the running ones.
+            for f in futures:
+                f.cancel()
+
+    # jj only snapshots the workspace it runs in, and everything after this
+    # runs in the main one, so the last command's edits in every other
+    # workspace would be missed.
+    for path in workspace_paths[1:]:
+        snapshot_workspace(path)
+    return all_successful
+
+
+def snapshot_workspace(workspace_path: str) -> None:
+    """
+    Record the working copy of a workspace in its change.
+
+    :param workspace_path: Path to the workspace directory
+    """
+    # Any jj command snapshots; `status` works with every jj version.
+    run_quiet([JJ, "status"], cwd=workspace_path)
 
 
 def handle_errors(
@@ -350,6 +798,13 @@ def parse_args() -> argparse.Namespace:
         default="continue",
         help="Error handling strategy",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of changes to process in parallel (default: 1)",
+    )
     parser.add_argument(
         "command",
         nargs=argparse.REMAINDER,
@@ -358,6 +813,8 @@ def parse_args() -> argparse.Namespace:
     args = parser.parse_args()
     if not args.command:
         parser.error("the following arguments are required: command")
+    if args.jobs < 1:
+        parser.error("argument -j/--jobs: must be at least 1")
     return args
 
 
@@ -365,8 +822,8 @@ def get_current_op_id() -> str:
     """
     Returns the current operation id (full hash) as a string.
     """
-    return run(
-        ["jj", "op", "log", "-n1", "-Tid", "--no-graph", "--no-pager"], cwd="."
+    return run_capture(
+        [JJ, "op", "log", "-n1", "-Tid", "--no-graph", "--no-pager"], cwd="."
     ).stdout.strip()
 
 
@@ -377,6 +834,9 @@ def main() -> None:
 
     args = parse_args()
 
+    # This can't be folded into the `jj log` calls made later: `jj log` can't
+    # print operation IDs, and the op has to be recorded before the temp
+    # workspace is added.
     try:
         before_op = get_current_op_id()
     except subprocess.CalledProcessError as e:
@@ -393,6 +853,7 @@ def main() -> None:
             command=" ".join(args.command),
             revset=args.revset,
             err_strategy=args.err_strategy,
+            jobs=args.jobs,
         )
         after_op = get_current_op_id()
     except SystemExit as _e:
@@ -0,0 +1,126 @@
+"""Shared helper for the test drivers: run a command, stream and capture its output."""
+
+import os
+import select
+import selectors
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+
+# All subprocesses here pass close_fds=False: fds that Python opens are not
+# inheritable anyway (PEP 446), so there is nothing to hide from children, and
+# this skips closing every other fd on each spawn.
+
+# The jj-run script under test, resolved once
+JJ_RUN = str((Path(__file__).parent / ".." / "src" / "jj_run" / "main.py").resolve())
+
+
+def _wait_pidfd(process):
+    """Waits for the process to exit, sleeping on a pidfd on Linux instead of polling."""
+    if sys.platform == "linux" and hasattr(os, "pidfd_open"):
+        try:
+            fd = os.pidfd_open(process.pid)
+        except OSError:
+            # E.g. ENOSYS on kernels older than 5.3
+            pass
+        else:
+            try:
+                select.select([fd], [], [])
+            finally:
+                os.close(fd)
+    return process.wait()
+
+
+def demo(command, check=False, cwd=None):
+    """
+    Prints, executes a command, streams its output, and returns the captured output.
+
+    The command is an argv list; it's run directly, without a shell, in `cwd`
+    (the current directory by default).
+    With check=True, raises CalledProcessError if the command fails.
+    """
+    print(shlex.join(command))
+    print("-----------------------------------------------------------------")
+
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        close_fds=False,
+    )
+
+    stdout_buf = bytearray()
+    stderr_buf = bytearray()
+    # Drain both pipes as data arrives, so that neither of them can fill up
+    # and block the child while we are waiting on the other one. Output is
+    # forwarded and captured as raw bytes and only decoded once at the end.
+    sys.stdout.flush()
+    sys.stderr.flush()
+    streams = {}
+    for pipe, out, buf in (
+        (process.stdout, sys.stdout.buffer, stdout_buf),
+        (process.stderr, sys.stderr.buffer, stderr_buf),
+    ):
+        if pipe:
+            os.set_blocking(pipe.fileno(), False)
+            streams[pipe.fileno()] = (out, buf)
+    # How much of each buffer has been forwarded already
+    forwarded = {fd: 0 for fd in streams}
+    with selectors.DefaultSelector() as sel:
+        for fd in streams:
+            sel.register(fd, selectors.EVENT_READ)
+        while sel.get_map():
+            for key, _ in sel.select():
+                out, buf = streams[key.fd]
+                chunk = os.read(key.fd, 65536)
+                buf.extend(chunk)
+                # Forward in batches: at a line boundary, once enough has piled
+                # up, or at EOF.
+                start = forwarded[key.fd]
+                if not chunk or chunk.endswith(b"\n") or len(buf) - start >= 8192:
+                    if len(buf) > start:
+                        out.write(buf[start:])
+                        out.flush()
+                    forwarded[key.fd] = len(buf)
+                if not chunk:
+                    sel.unregister(key.fd)
+    for pipe in (process.stdout, process.stderr):
+        if pipe:
+            pipe.close()
+    return_code = _wait_pidfd(process)
+
+    print("-----------------------------------------------------------------\n")
+
+    stdout = stdout_buf.decode("utf-8", errors="replace")
+    stderr = stderr_buf.decode("utf-8", errors="replace")
+
+    if check and return_code != 0:
+        raise subprocess.CalledProcessError(
+            return_code, command, output=stdout, stderr=stderr
+        )
+
+    return subprocess.CompletedProcess(command, return_code, stdout, stderr)
+
+
+def demo_quiet(command, cwd=None):
+    """
+    Like demo(), but doesn't stream: output is printed once the command is done.
+
+    Meant for setup steps whose output is only there for the log.
+    """
+    print(shlex.join(command))
+    print("-----------------------------------------------------------------")
+    result = subprocess.run(
+        command,
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=False,
+        close_fds=False,
+    )
+    sys.stdout.write(result.stdout)
+    sys.stderr.write(result.stderr)
+    print("-----------------------------------------------------------------\n")
+    return result
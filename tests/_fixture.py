@@ -0,0 +1,146 @@
+"""Test repos: built once into a cached template, then copied for each test run.
+
+The templates live in `jj-run-test-repos` under the system temp dir, and are
+safe to delete at any time. When a new one is built, templates from an older
+build of the same jj binary are removed; other jj binaries' templates are left
+alone, since another checkout may be using them.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+
+# Where the templates are kept
+CACHE_DIR = os.path.join(tempfile.gettempdir(), "jj-run-test-repos")
+
+# The history shared by test2.py, test_fatal.py and test_stop.py
+FAILME_COMMITS = [
+    ("one .txt file", {"one.txt": "First commit\n"}),
+    ("failme", {"failme.txt": "This will fail\n"}),
+    ("another single .txt file", {"third.txt": "Third commit\n"}),
+]
+
+# The history used by test1.py and test_jobs.py
+MERGE_COMMITS = [
+    ("one .txt file", {"one.txt": "First commit\n"}),
+    (
+        "multiple .txt files",
+        {"multi1.txt": "Line A\nLine B\n", "multi2.txt": "Another file\n"},
+    ),
+    ("another single .txt file", {"third.txt": "Third commit\n"}),
+]
+
+# Lines of `jj log -p` output to compare: not a commit line (starting with a
+# graph node) and not blank
+keep_snapshot_line = re.compile(r"(?![@○◆]).*\S").match
+
+# Golden snapshot of `jj log -p` for MERGE_COMMITS after jj-run merged all
+# .txt files into merged.txt, keeping only keep_snapshot_line lines
+MERGED_SNAPSHOT = """
+│  Modified regular file merged.txt:
+│     1    1: Line A
+│     2    2: Line B
+│     3    3: Another file
+│     4    4: First commit
+│          5: Third commit
+│  Modified regular file merged.txt:
+│          1: Line A
+│          2: Line B
+│          3: Another file
+│     1    4: First commit
+│  Added regular file merged.txt:
+│          1: First commit
+""".strip()
+
+
+def make_repo(repo_dir, commits):
+    """
+    Fills repo_dir with a colocated jj repo containing the given commits.
+
+    `commits` is a list of (message, {file name: contents}) pairs, committed in
+    order. The repo is built once per distinct list (and jj binary) into a
+    template directory under CACHE_DIR; every later call, including ones from
+    other test processes, just copies the template.
+    """
+    template = _template_path(commits)
+    if not os.path.isdir(template):
+        _build_template(template, commits)
+    shutil.copytree(template, repo_dir, symlinks=True, dirs_exist_ok=True)
+
+
+def _key(value, length):
+    return hashlib.sha256(repr(value).encode()).hexdigest()[:length]
+
+
+def _jj_keys():
+    # Rebuild the templates whenever jj itself changes. The binary's path and
+    # its mtime are keyed separately, so that we can tell our own stale
+    # templates apart from ones made by a different jj.
+    jj = shutil.which("jj") or "jj"
+    try:
+        jj_stamp = os.stat(jj).st_mtime_ns
+    except OSError:
+        jj_stamp = 0
+    return _key(jj, 8), _key(jj_stamp, 8)
+
+
+def _template_path(commits):
+    path_key, stamp_key = _jj_keys()
+    return os.path.join(CACHE_DIR, f"{path_key}-{stamp_key}-{_key(commits, 16)}")
+
+
+def _remove_stale_templates():
+    # Templates from an older build of the same jj will never be used again
+    path_key, stamp_key = _jj_keys()
+    for name in os.listdir(CACHE_DIR):
+        other_path_key, _, rest = name.partition("-")
+        if other_path_key == path_key and not rest.startswith(stamp_key + "-"):
+            shutil.rmtree(os.path.join(CACHE_DIR, name), ignore_errors=True)
+
+
+def _wf(path, data):
+    # Plain os.open/os.write: no file object to set up for a one-shot write
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data.encode())
+    finally:
+        os.close(fd)
+
+
+def _build_template(template, commits):
+    # Build next to the final location and rename it into place, so that a
+    # concurrent test never sees a half-built template.
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    _remove_stale_templates()
+    build_dir = tempfile.mkdtemp(
+        prefix=os.path.basename(template) + "-", dir=os.path.dirname(template)
+    )
+    try:
+        subprocess.run(
+            ["jj", "git", "init", "--colocate", "."],
+            cwd=build_dir,
+            capture_output=True,
+            check=True,
+            close_fds=False,
+        )
+        for message, files in commits:
+            for name, contents in files.items():
+                _wf(os.path.join(build_dir, name), contents)
+            subprocess.run(
+                ["jj", "commit", "-m", message, *files],
+                cwd=build_dir,
+                capture_output=True,
+                check=True,
+                close_fds=False,
+            )
+        os.rename(build_dir, template)
+    except OSError:
+        # Another test process got there first
+        if not os.path.isdir(template):
+            raise
+    finally:
+        if os.path.isdir(build_dir):
+            shutil.rmtree(build_dir)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Runs all the test drivers concurrently in one process.
+
+Each test works in its own temporary repo and mostly waits on jj, so they can
+share an interpreter; their output is interleaved.
+"""
+
+import subprocess
+import sys
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import test1
+import test2
+import test_fatal
+import test_jobs
+import test_stop
+import test_syntax
+
+TESTS = [test1, test2, test_fatal, test_jobs, test_stop, test_syntax]
+
+
+def _run(test):
+    try:
+        test.main()
+    except SystemExit as e:
+        # The drivers report failures with sys.exit(1)
+        return e.code in (None, 0)
+    except (AssertionError, subprocess.CalledProcessError):
+        traceback.print_exc()
+        return False
+    return True
+
+
+def main():
+    with ThreadPoolExecutor(max_workers=len(TESTS)) as pool:
+        results = list(pool.map(_run, TESTS))
+    failed = [test.__name__ for test, ok in zip(TESTS, results) if not ok]
+    if failed:
+        print(f"runner.py: FAILED: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+    print("runner.py: SUCCESS")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,68 +1,30 @@
 #!/usr/bin/env python3
 
 import os
-import subprocess
 import tempfile
-import shutil
-import sys
-from pathlib import Path
 
-
-def demo(command):
-    """Prints, executes a command, streams its output, and returns the captured output."""
-    print(command if isinstance(command, str) else " ".join(command))
-    print("-----------------------------------------------------------------")
-
-    if isinstance(command, list):
-        process = subprocess.Popen(
-            command, text=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
-        )
-    else:
-        process = subprocess.Popen(
-            command,
-            shell=True,
-            text=True,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
-
-    stdout, stderr = process.communicate()
-    sys.stdout.write(stdout)
-    sys.stderr.write(stderr)
-
-    print("-----------------------------------------------------------------\n")
-
-    return subprocess.CompletedProcess(command, process.returncode, stdout, stderr)
+from _demo_util import JJ_RUN, demo, demo_quiet
+from _fixture import FAILME_COMMITS, make_repo
 
 
 def main():
     os.environ["PAGER"] = "cat"
-    script_dir = Path(__file__).parent
-    repo_dir = tempfile.mkdtemp()
-    original_dir = os.getcwd()
-    os.chdir(repo_dir)
-    try:
+    with tempfile.TemporaryDirectory() as repo_dir:
         print()
-        demo("jj git init --colocate .")
-        Path("one.txt").write_text("First commit\n")
-        demo("jj commit -m 'one .txt file' one.txt")
-        Path("failme.txt").write_text("This will fail\n")
-        demo("jj commit -m 'failme' failme.txt")
-        Path("third.txt").write_text("Third commit\n")
-        demo("jj commit -m 'another single .txt file' third.txt")
+        make_repo(repo_dir, FAILME_COMMITS)
         # Show commit contents before running jj-run
-        demo("jj log -p -r '::'")
-        # Run jj-run.py with a command that fails if failme.txt exists
+        demo_quiet(["jj", "log", "-p", "-r", "::"], cwd=repo_dir)
+        # Run jj-run with a command that fails if failme.txt exists
         jj_run_command = [
             "python3",
-            str((script_dir / ".." / "jj-run.py").resolve()),
+            JJ_RUN,
             "-r",
             "::",
             "-e",
             "continue",
             "test -f failme.txt && exit 1",
         ]
-        result = demo(jj_run_command)
+        result = demo(jj_run_command, cwd=repo_dir)
         # Should report error for failed command
         assert "Error while processing change" in result.stderr, (
             "Should report error for failed command"
@@ -76,14 +38,14 @@ def main():
         # Now test -e stop (should exit nonzero)
         jj_run_command_stop = [
             "python3",
-            str((script_dir / ".." / "jj-run.py").resolve()),
+            JJ_RUN,
             "-r",
             "::",
             "-e",
             "stop",
             "test -f failme.txt && exit 1",
         ]
-        result_stop = demo(jj_run_command_stop)
+        result_stop = demo(jj_run_command_stop, cwd=repo_dir)
         assert result_stop.returncode != 0, (
             "Should exit nonzero with -e stop on failure"
         )
@@ -91,9 +53,6 @@ def main():
             "Should report command failed with return code 1"
         )
         print("test2.py: SUCCESS")
-    finally:
-        os.chdir(original_dir)
-        shutil.rmtree(repo_dir)
 
 
 if __name__ == "__main__":
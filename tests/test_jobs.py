@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import tempfile
+
+from _demo_util import JJ_RUN, demo
+from _fixture import MERGE_COMMITS, MERGED_SNAPSHOT, keep_snapshot_line, make_repo
+
+
+def main():
+    os.environ["PAGER"] = "cat"
+    with tempfile.TemporaryDirectory() as repo_dir:
+        print()
+        make_repo(repo_dir, MERGE_COMMITS)
+        # Same as test1.py, but with the changes spread over two workspaces
+        jj_run_command = [
+            "python3",
+            JJ_RUN,
+            "-j",
+            "2",
+            "-r",
+            "::",
+            'for f in *.txt; do cat "$f" >> merged.txt; rm "$f"; done',
+        ]
+        result = demo(jj_run_command, check=True, cwd=repo_dir)
+        assert (
+            f"Rewrote {len(MERGE_COMMITS)}/{len(MERGE_COMMITS)} commits."
+            in result.stderr
+        ), f"Should rewrite every commit, but got:\n{result.stderr}"
+
+        result_after = demo(["jj", "log", "-p", "-r", "::"], check=True, cwd=repo_dir)
+        actual_after = "\n".join(
+            filter(keep_snapshot_line, result_after.stdout.split("\n"))
+        ).strip()
+        if actual_after != MERGED_SNAPSHOT:
+            print("test_jobs.py: After log snapshot mismatch", file=sys.stderr)
+            print("--- Expected ---", file=sys.stderr)
+            print(MERGED_SNAPSHOT, file=sys.stderr)
+            print("--- Actual ---", file=sys.stderr)
+            print(actual_after, file=sys.stderr)
+            sys.exit(1)
+
+        print("test_jobs.py: SUCCESS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import os
+import tempfile
+
+from _demo_util import JJ_RUN, demo, demo_quiet
+from _fixture import FAILME_COMMITS, make_repo
+
+
+def main():
+    os.environ["PAGER"] = "cat"
+    with tempfile.TemporaryDirectory() as repo_dir:
+        print()
+        make_repo(repo_dir, FAILME_COMMITS)
+        demo_quiet(["jj", "log", "-p", "-r", "::"], cwd=repo_dir)
+        # Run jj-run with a command that the shell can't even parse
+        jj_run_command = [
+            "python3",
+            JJ_RUN,
+            "-r",
+            "::",
+            "-e",
+            "continue",
+            "if then fi (",
+        ]
+        result = demo(jj_run_command, cwd=repo_dir)
+        # Should exit 0 with -e continue
+        assert result.returncode == 0, (
+            f"Should exit 0 with -e continue, but got:\n{result.stderr}"
+        )
+        # Every change should get its own syntax error, not just the first one
+        failures = result.stderr.count("Command failed with return code 2")
+        assert failures == len(FAILME_COMMITS), (
+            f"Should report a syntax error for each change, but got:\n{result.stderr}"
+        )
+        print("test_syntax.py: SUCCESS")
+
+
+if __name__ == "__main__":
+    main()